@@ -1,16 +1,51 @@
 import streamlit as st
 import awswrangler as wr
 import pandas as pd
+import numpy as np
 import boto3
-import plotly.express as px
+import hashlib
 import os
+import queue
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
 from botocore.exceptions import ClientError, NoCredentialsError
+from live_queries import LIVE_COLS, live_cutoff, live_dedup_query, partition_filter
 
 # ----------------- Configuration -----------------
 AWS_REGION = "eu-north-1"
 DATABASE = "football_db"
 TABLE = "live_portfolio_projected"
 S3_OUTPUT = "s3://portfolio-lake-yevhen-3991/athena-results/"
+UNLOAD_OUTPUT = f"{S3_OUTPUT}unload/"  # Parent of the per-query UNLOAD prefixes, expire via lifecycle rule
+LATEST_TABLE = "live_portfolio_latest"  # Latest row per player, rebuilt by materialize_latest.py
+LATEST_MAX_AGE = 1800  # Seconds since its last rebuild before LATEST_TABLE is ignored (3 missed runs)
+HISTORY_START = date(2026, 2, 13)  # Ingestions on the 11th/12th were broken
+HISTORY_METRICS = ["goals", "assists", "total_points", "creativity", "influence", "form", "threat", "ict_index"]
+HISTORY_CACHE_PATH = "s3://portfolio-lake-yevhen-3991/cache/historical/"  # Parquet copies, one prefix per query
+# Worst-case age of the history frame: an S3 copy up to HISTORY_CACHE_MAX_AGE old, then
+# held in st.cache_data for the rest of HISTORY_TTL
+HISTORY_TTL = 3600
+HISTORY_CACHE_MAX_AGE = 900
+# Columns of the frame get_live_data returns. The local snapshot's file name carries a hash
+# of them, so a snapshot written by a deploy with a different frame is never read back.
+LIVE_FRAME_COLS = ('id', 'web_name', *LIVE_COLS, 'ingested_at', 'snapshot_ts', '_has_injury')
+SNAPSHOT_PATH = os.path.join(
+    tempfile.gettempdir(),
+    f"portfolio_snapshot_{hashlib.sha1(','.join(LIVE_FRAME_COLS).encode()).hexdigest()[:12]}.parquet"
+)
+# Worst-case age of the live frame: a snapshot up to SNAPSHOT_MAX_AGE old, then held in
+# st.cache_data for the rest of LIVE_TTL
+LIVE_TTL = 600
+SNAPSHOT_MAX_AGE = 120
+# Stat columns coerced to numbers after load. Season totals (minutes tops out ~3.4k)
+# fit int16; the FPL indices stay float64 (see _coerce_numeric).
+NUM_INT_COLS = ['goals', 'assists', 'total_points', 'minutes', 'saves', 'clean_sheets',
+                'yellow_cards', 'red_cards', 'chance_of_playing', 'position_id']
+NUM_FLOAT_COLS = ['form', 'influence', 'creativity', 'threat', 'ict_index']
+HALF_CHART_WIDTH = 560  # Fixed px width for charts in st.columns(2), avoids resize relayouts
 
 st.set_page_config(
     page_title="Premier League Live Control Room",
@@ -32,34 +67,113 @@ except (FileNotFoundError, KeyError, AttributeError):
 # -----------------------------------------------------------------------------
 
 # ----------------- Data Fetching -----------------
-@st.cache_data(ttl=600)
-def get_live_data():
+@st.cache_resource
+def _session_pool():
+    # Idle boto3 sessions, kept across reruns and browser sessions
+    return queue.SimpleQueue()
+
+@contextmanager
+def _aws_session():
+    # boto3 Sessions aren't thread-safe, and Streamlit starts a new script thread on every
+    # rerun, so neither one shared session nor one per thread works. Each call borrows an
+    # idle session for its exclusive use and returns it, so credential resolution happens
+    # once per session instead of once per query.
+    pool = _session_pool()
     try:
+        session = pool.get_nowait()
+    except queue.Empty:
         session = boto3.Session(region_name=AWS_REGION)
-        
-        # SQL Query Logic with Deduplication and Data Validation
-        query = f"""
-        WITH RankedPlayers AS (
-            SELECT
-                *,
-                ROW_NUMBER() OVER (PARTITION BY id ORDER BY ingested_at DESC) as rank
-            FROM "{DATABASE}"."{TABLE}" 
-        )
-        SELECT * FROM RankedPlayers WHERE rank = 1
-        """
-        
-        df = wr.athena.read_sql_query(
+    try:
+        yield session
+    finally:
+        pool.put(session)
+
+def _coerce_numeric(df):
+    """Coerce whichever NUM_INT_COLS / NUM_FLOAT_COLS are present, one block per dtype."""
+    int_cols = [c for c in NUM_INT_COLS if c in df.columns]
+    flt_cols = [c for c in NUM_FLOAT_COLS if c in df.columns]
+    if int_cols:
+        df[int_cols] = df[int_cols].apply(pd.to_numeric, errors='coerce').fillna(0).astype('int16')
+    if flt_cols:
+        # Rounded and kept as float64 so Plotly/JSON payloads don't carry long float tails;
+        # float32 can't hold values like 12.3 exactly and would serialize 12.300000190734863
+        df[flt_cols] = df[flt_cols].apply(pd.to_numeric, errors='coerce').fillna(0.0).round(2).astype('float64')
+    return df
+
+def _read_sql(query):
+    """Run an Athena query and read the result back as Parquet.
+
+    Every Athena read in the app goes through here. Each call UNLOADs to a fresh prefix
+    under UNLOAD_OUTPUT, which is cleaned up by the bucket lifecycle rule (see README).
+    """
+    with _aws_session() as session:
+        return wr.athena.read_sql_query(
             sql=query,
             database=DATABASE,
-            s3_output=S3_OUTPUT,
+            # UNLOAD refuses to write into a non-empty location, so every query gets its own prefix
+            s3_output=f"{UNLOAD_OUTPUT}{uuid.uuid4().hex}/",
             boto3_session=session,
-            ctas_approach=False
+            ctas_approach=False,
+            # UNLOAD writes the result as Parquet, which is read back typed via Arrow
+            # instead of parsing a single CSV file.
+            unload_approach=True,
+            unload_parameters={"file_format": "PARQUET", "compression": "SNAPPY"}
         )
+
+def _latest_table_is_fresh():
+    """True if LATEST_TABLE exists and was rebuilt within the last LATEST_MAX_AGE seconds."""
+    try:
+        with _aws_session() as session:
+            table = session.client('glue').get_table(DatabaseName=DATABASE, Name=LATEST_TABLE)['Table']
+    except ClientError:
+        return False
+    # Rebuilds repoint the table with update_table; a freshly created one only has CreateTime
+    built = table.get('UpdateTime', table['CreateTime'])
+    return datetime.now(timezone.utc) - built < timedelta(seconds=LATEST_MAX_AGE)
+
+@st.cache_data(ttl=LIVE_TTL - SNAPSHOT_MAX_AGE)
+def get_live_data():
+    # Warm restart: st.cache_data is gone, but the last pull may still be on local disk
+    if os.path.exists(SNAPSHOT_PATH) and time.time() - os.path.getmtime(SNAPSHOT_PATH) < SNAPSHOT_MAX_AGE:
+        try:
+            return pd.read_parquet(SNAPSHOT_PATH, engine='pyarrow')
+        except Exception:
+            pass  # Unreadable snapshot, fall through to Athena
+
+    try:
+        df = None
+        if _latest_table_is_fresh():
+            # Pre-deduplicated by materialize_latest.py, so this is a plain projection.
+            # A stalled rebuild job falls back to deduplicating on the fly below.
+            try:
+                df = _read_sql(f"""
+                SELECT id, web_name, {', '.join(LIVE_COLS)}, ingested_at, snapshot_ts
+                FROM "{DATABASE}"."{LATEST_TABLE}"
+                """)
+            except Exception:
+                pass  # Unreadable table, deduplicate from the source instead
+        if df is None:
+            # SQL Query Logic with Deduplication and Data Validation
+            df = _read_sql(live_dedup_query(DATABASE, TABLE, live_cutoff()))
+        
+        # Typed once here so the cached frame is ready for every rerun
+        df = _coerce_numeric(df)
+        
+        # Categorical codes make the sidebar isin() filters and colour grouping cheap
+        df['team'] = df['team'].astype('category')
+        df['web_name'] = df['web_name'].astype('category')
+        
+        # Flag injured players once here instead of string-comparing on every rerun
+        if 'injury_news' in df.columns:
+            df['_has_injury'] = df['injury_news'].fillna('').ne('')
+        
+        # Best-effort snapshot, written aside and swapped in so readers never see a partial file
+        try:
+            df.to_parquet(f"{SNAPSHOT_PATH}.tmp", engine='pyarrow', compression='zstd')
+            os.replace(f"{SNAPSHOT_PATH}.tmp", SNAPSHOT_PATH)
+        except OSError:
+            pass
         
-        # Renaissance Refactor: Ensure compatibility if column names changed in projection
-        if 'name' in df.columns and 'web_name' not in df.columns:
-            df.rename(columns={'name': 'web_name'}, inplace=True)
-            
         return df
 
     except NoCredentialsError:
@@ -69,11 +183,24 @@ def get_live_data():
         st.error(f"Error connecting to AWS Athena: {e}")
         return None
 
-@st.cache_data(ttl=3600)
+def _read_history_cache(path, max_age):
+    """Return the Parquet dataset at `path` if it was written within `max_age` seconds."""
+    try:
+        with _aws_session() as session:
+            fresh = wr.s3.list_objects(
+                path,
+                last_modified_begin=datetime.now(timezone.utc) - timedelta(seconds=max_age),
+                boto3_session=session
+            )
+            if fresh:
+                return wr.s3.read_parquet(path, dataset=True, boto3_session=session)
+    except Exception:
+        pass  # Missing or unreadable cache, fall back to Athena
+    return None
+
+@st.cache_data(ttl=HISTORY_TTL - HISTORY_CACHE_MAX_AGE)
 def get_historical_data():
     try:
-        session = boto3.Session(region_name=AWS_REGION)
-        
         # Fetch data for time series analysis
         # Using 'name' as it's in the primary schema, but renaming to 'web_name' for app consistency
         # Filtering out data before 2026-02-13 as requested (broken data on 11th/12th)
@@ -83,17 +210,24 @@ def get_historical_data():
             creativity, influence, form, threat, ict_index, ingested_at,
             year, month, day
         FROM "{DATABASE}"."{TABLE}"
-        WHERE ingested_at >= '2026-02-13'
-        ORDER BY ingested_at ASC
+        WHERE ingested_at >= '{HISTORY_START}' AND {partition_filter(HISTORY_START)}
         """
         
-        df = wr.athena.read_sql_query(
-            sql=query,
-            database=DATABASE,
-            s3_output=S3_OUTPUT,
-            boto3_session=session,
-            ctas_approach=False
-        )
+        # Container restarts lose st.cache_data; an in-region S3 Parquet read is far cheaper
+        # than queueing and scanning in Athena again
+        # Keyed by the query text, so a changed query never reads another query's copy
+        cache_path = f"{HISTORY_CACHE_PATH}{hashlib.sha1(query.encode()).hexdigest()[:12]}/"
+        df = _read_history_cache(cache_path, max_age=HISTORY_CACHE_MAX_AGE)
+        if df is None:
+            df = _read_sql(query)
+            try:
+                with _aws_session() as session:
+                    wr.s3.to_parquet(
+                        df, cache_path, dataset=True, mode='overwrite',
+                        compression='snappy', boto3_session=session
+                    )
+            except Exception:
+                pass  # Cache is best-effort
         
         # Rename if necessary
         if 'name' in df.columns and 'web_name' not in df.columns:
@@ -101,19 +235,122 @@ def get_historical_data():
             
         # Data processing for time series
         df['ingested_at'] = pd.to_datetime(df['ingested_at'])
-        df['date'] = df['ingested_at'].dt.date
+        # Sorted here rather than with ORDER BY: a distributed sort in Athena is costly, and
+        # UNLOAD spreads results over several files so it wouldn't survive the read anyway
+        df = df.sort_values('ingested_at', ignore_index=True)
+        # Day as datetime64 (not .dt.date, which yields a Python-object column)
+        df['date'] = df['ingested_at'].dt.normalize()
         
         # Cast metrics to numeric
-        numeric_cols = ['goals', 'assists', 'total_points', 'creativity', 'influence', 'form', 'threat', 'ict_index']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        df = _coerce_numeric(df)
+        
+        df['team'] = df['team'].astype('category')
+        df['web_name'] = df['web_name'].astype('category')
             
         return df
     except Exception as e:
         st.error(f"Error fetching historical data: {e}")
         return None
 
+def _sql_literal(value):
+    """Quote a string for inlining into Athena SQL (team names like "Nott'm Forest")."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+@st.cache_data(ttl=3600)
+def get_history_teams():
+    try:
+        # Only the team column is scanned
+        query = f"""
+        SELECT DISTINCT team
+        FROM "{DATABASE}"."{TABLE}"
+        WHERE ingested_at >= '{HISTORY_START}' AND {partition_filter(HISTORY_START)}
+        """
+        df = _read_sql(query)
+        return sorted(df['team'].dropna().tolist())
+    except Exception as e:
+        st.error(f"Error fetching historical data: {e}")
+        return None
+
+@st.cache_data(ttl=3600)
+def get_team_daily(teams, metric):
+    """Daily sum of `metric` per team, aggregated in Athena.
+
+    Returns a small (date, team, metric) frame instead of pulling the full history into
+    pandas. `teams` must be a tuple so the call is hashable for st.cache_data.
+    """
+    if metric not in HISTORY_METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+    try:
+        # ingested_at may be stored as a string or a timestamp; its first 10 chars are the day
+        query = f"""
+        SELECT
+            CAST(substr(CAST(ingested_at AS varchar), 1, 10) AS date) as "date",
+            team,
+            SUM(COALESCE(TRY_CAST({metric} AS double), 0)) as {metric}
+        FROM "{DATABASE}"."{TABLE}"
+        WHERE ingested_at >= '{HISTORY_START}' AND {partition_filter(HISTORY_START)}
+            AND team IN ({", ".join(_sql_literal(t) for t in teams)})
+        GROUP BY 1, 2
+        """
+        df = _read_sql(query)
+        df['date'] = pd.to_datetime(df['date'])
+        return df.sort_values('date', ignore_index=True)
+    except Exception as e:
+        st.error(f"Error fetching historical data: {e}")
+        return None
+
+# ----------------- Aggregations -----------------
+# Leaderboards and KPI totals are not memoized: on a few hundred rows, hashing the frame
+# for st.cache_data costs more than recomputing them.
+def top_k(df, col, k=10, extra_cols=()):
+    # Leaderboards only render name, team and the ranked metric, so hand just those
+    # columns on to Plotly / st.dataframe. Partial selection instead of sorting the
+    # whole frame to keep k rows.
+    return df[['web_name', 'team', col, *extra_cols]].nlargest(k, col)
+
+def kpi_totals(df):
+    return {
+        'players': len(df),
+        'goals': int(df['goals'].sum()),
+        'assists': int(df['assists'].sum()),
+        'injuries': int(df['_has_injury'].sum()) if '_has_injury' in df.columns else 0,
+    }
+
+# Live slices, cached the same way as the historical ones below: `live_key` (row count +
+# snapshot time) identifies the load, so the frame itself isn't hashed on every rerun.
+def live_key(df):
+    return len(df), df['snapshot_ts'].iloc[0]
+
+@st.cache_data(ttl=600)
+def filter_live_data(_df, key, teams, players):
+    # Combine both filters into one mask so the frame is sliced only once.
+    # An empty tuple means "no filter" for that dimension.
+    mask = np.ones(len(_df), dtype=bool)
+    if teams:
+        mask &= _df['team'].isin(teams).to_numpy()
+    if players:
+        mask &= _df['web_name'].isin(players).to_numpy()
+    return _df.loc[mask]
+
+@st.cache_data(ttl=600)
+def team_player_index(df):
+    # team -> sorted player names, so the dependent player filter is a dict lookup
+    return {t: sorted(sub['web_name'].unique().tolist()) for t, sub in df.groupby('team', observed=True)}
+
+# Historical slices. The leading underscore stops st.cache_data hashing the full history
+# frame on every call; `history_key` (row count + newest ingestion) identifies the load.
+def history_key(df_hist):
+    return len(df_hist), df_hist['ingested_at'].iloc[-1]
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def history_players(_df_hist, key, team):
+    players = _df_hist['web_name'] if team == "All" else _df_hist.loc[_df_hist['team'] == team, 'web_name']
+    return sorted(players.unique().tolist())
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def player_history(_df_hist, key, player):
+    return _df_hist[_df_hist['web_name'] == player]
+
 # ----------------- Navigation -----------------
 def show_metrics_glossary():
     with st.expander("📖 Stats Glossary & Definitions"):
@@ -145,6 +382,161 @@ with st.sidebar:
     st.markdown("---")
 
 # ----------------- Page 1: Live Control Room -----------------
+# One render function per tab body
+def render_attack_tab(tops):
+    import plotly.express as px
+
+    st.subheader("Attacking Prowess")
+    col_att1, col_att2 = st.columns(2)
+
+    with col_att1:
+        st.markdown("#### 🥅 Top 10 Goal Scorers")
+        top_goals = tops['goals']
+        fig_goals = px.bar(
+            top_goals, x='goals', y='web_name', orientation='h', color='team',
+            title="Most Goals", labels={'goals': 'Goals', 'web_name': ''}, height=400
+        )
+        fig_goals.update_layout(yaxis=dict(autorange="reversed"), width=HALF_CHART_WIDTH, autosize=False)
+        st.plotly_chart(fig_goals, use_container_width=False, key="fig_goals")
+
+    with col_att2:
+        st.markdown("#### 🎯 Top 10 Assistants")
+        top_assists = tops['assists']
+        fig_assists = px.bar(
+            top_assists, x='assists', y='web_name', orientation='h', color='team',
+            title="Most Assists", labels={'assists': 'Assists', 'web_name': ''}, height=400
+        )
+        fig_assists.update_layout(yaxis=dict(autorange="reversed"), width=HALF_CHART_WIDTH, autosize=False)
+        st.plotly_chart(fig_assists, use_container_width=False, key="fig_assists")
+
+    st.markdown("#### 🔥 Threat Leaders")
+    top_threat = tops['threat']
+    fig_threat = px.bar(
+        top_threat, x='web_name', y='threat', color='team',
+        title="Highest Threat Index", labels={'threat': 'Threat', 'web_name': ''}
+    )
+    st.plotly_chart(fig_threat, use_container_width=True, key="fig_threat")
+
+def render_defense_tab(df, tops):
+    import plotly.express as px
+
+    st.subheader("Defensive & Discipline Metrics")
+
+    col_def1, col_def2 = st.columns(2)
+
+    with col_def1:
+        st.markdown("#### 🧤 Top Goalkeeper Saves")
+        # Filter for players with saves > 0 (Likely GKs)
+        saves_df = tops['saves'][tops['saves']['saves'] > 0]
+        if not saves_df.empty:
+            fig_saves = px.bar(
+                saves_df, x='saves', y='web_name', orientation='h', color='team',
+                title="Most Saves", labels={'saves': 'Saves', 'web_name': ''}, height=400
+            )
+            fig_saves.update_layout(yaxis=dict(autorange="reversed"), width=HALF_CHART_WIDTH, autosize=False)
+            st.plotly_chart(fig_saves, use_container_width=False, key="fig_saves")
+        else:
+            st.info("No save data available.")
+
+    with col_def2:
+        st.markdown("#### 🛡️ Clean Sheets")
+        cs_df = tops['clean_sheets'][tops['clean_sheets']['clean_sheets'] > 0]
+        if not cs_df.empty:
+            fig_cs = px.bar(
+                cs_df, x='clean_sheets', y='web_name', orientation='h', color='team',
+                title="Most Clean Sheets", labels={'clean_sheets': 'Clean Sheets', 'web_name': ''}, height=400
+            )
+            fig_cs.update_layout(yaxis=dict(autorange="reversed"), width=HALF_CHART_WIDTH, autosize=False)
+            st.plotly_chart(fig_cs, use_container_width=False, key="fig_cs")
+        else:
+            st.info("No clean sheet data available.")
+
+    st.markdown("---")
+
+    col_misc1, col_misc2 = st.columns(2)
+    with col_misc1:
+        st.markdown("#### ⏱️ Most Played Minutes")
+        top_min = tops['minutes']
+        st.dataframe(top_min[['web_name', 'team', 'minutes']], hide_index=True, use_container_width=True)
+
+    with col_misc2:
+        st.markdown("#### 🟨🟥 Discipline")
+        # Combined card view
+        cards_df = top_k(df[(df['yellow_cards'] > 0) | (df['red_cards'] > 0)], 'yellow_cards', extra_cols=['red_cards'])
+        st.dataframe(cards_df[['web_name', 'team', 'yellow_cards', 'red_cards']], hide_index=True, use_container_width=True)
+
+def render_creative_tab(df, tops):
+    import plotly.express as px
+
+    st.subheader("Creativity, Influence & ICT Index")
+
+    col_creat1, col_creat2 = st.columns(2)
+
+    with col_creat1:
+        st.markdown("#### 🎨 Top Creators")
+        top_creative = tops['creativity']
+        fig_creative = px.bar(
+            top_creative, x='creativity', y='web_name', orientation='h', color='team',
+            title="Highest Creativity Score", labels={'creativity': 'Creativity', 'web_name': ''}, height=400
+        )
+        fig_creative.update_layout(yaxis=dict(autorange="reversed"), width=HALF_CHART_WIDTH, autosize=False)
+        st.plotly_chart(fig_creative, use_container_width=False, key="fig_creative")
+
+    with col_creat2:
+        st.markdown("#### 📊 ICT Index Leaders")
+        top_ict = tops['ict_index']
+        fig_ict = px.bar(
+            top_ict, x='ict_index', y='web_name', orientation='h', color='team',
+            title="Highest ICT Index", labels={'ict_index': 'ICT Index', 'web_name': ''}, height=400
+        )
+        fig_ict.update_layout(yaxis=dict(autorange="reversed"), width=HALF_CHART_WIDTH, autosize=False)
+        st.plotly_chart(fig_ict, use_container_width=False, key="fig_ict")
+
+    st.markdown("#### 🧠 Creativity vs Influence")
+    # Top 50 by ICT keeps the readable part of the cloud without shipping every player to the browser
+    scatter_df = top_k(df, 'ict_index', k=50, extra_cols=['influence', 'creativity'])
+    fig_scatter = px.scatter(
+        scatter_df, x='influence', y='creativity', size='ict_index', color='team',
+        hover_name='web_name', title="Creativity vs Influence (Top 50 by ICT, Size = ICT Index)",
+        height=500, render_mode='webgl'
+    )
+    st.plotly_chart(fig_scatter, use_container_width=True, key="fig_scatter")
+
+INJURY_STYLES = [
+    'background-color: #8B0000; color: white',  # Dark Red
+    'background-color: #B22222; color: white',  # Firebrick
+    'background-color: #DAA520; color: black',  # Goldenrod
+]
+
+def highlight_injury(view):
+    # One vectorized pass over the column, broadcast across each row
+    chance = view['chance_of_playing'].to_numpy()
+    styles = np.select([chance == 0, chance < 50, chance < 75], INJURY_STYLES, default='')
+    return pd.DataFrame(
+        np.broadcast_to(styles[:, None], view.shape),
+        index=view.index, columns=view.columns
+    )
+
+def render_injury_tab(df):
+    st.subheader("🚑 Injury Ward & Availability")
+
+    if 'injury_news' in df.columns:
+        injury_df = df.loc[df['_has_injury']]
+
+        if not injury_df.empty:
+            view_cols = ['web_name', 'team', 'injury_news', 'chance_of_playing']
+            injury_view = injury_df[view_cols].sort_values('chance_of_playing')
+
+            st.dataframe(
+                injury_view.style.apply(highlight_injury, axis=None),
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.success("No active injuries reported!")
+    else:
+        st.info("Injury data not available in this view.")
+
 def show_live_dashboard():
     # Load Data
     df = get_live_data()
@@ -158,15 +550,18 @@ def show_live_dashboard():
         if df is not None and not df.empty:
             st.subheader("Filters")
             
-            # Team Filter
-            teams = sorted(df['team'].unique().tolist())
+            # Cached once per data load; both option lists come from it
+            players_by_team = team_player_index(df)
+            
+            # Team Filter (keys are in sorted category order)
+            teams = list(players_by_team)
             selected_teams = st.multiselect("Select Team(s)", options=teams, default=teams)
             
             # Player Filter (dependent on team selection)
             if selected_teams:
-                available_players = sorted(df[df['team'].isin(selected_teams)]['web_name'].unique().tolist())
+                available_players = sorted(set().union(*(players_by_team[t] for t in selected_teams)))
             else:
-                available_players = sorted(df['web_name'].unique().tolist())
+                available_players = sorted(set().union(*players_by_team.values()))
                 
             selected_players = st.multiselect("Select Player(s)", options=available_players)
             
@@ -178,15 +573,10 @@ def show_live_dashboard():
 
     if df is not None and not df.empty:
         # ----------------- Apply Filters -----------------
-        filtered_df = df.copy()
-        
-        # Filter by Team
-        if selected_teams:
-            filtered_df = filtered_df[filtered_df['team'].isin(selected_teams)]
-        
-        # Filter by Player
-        if selected_players:
-            filtered_df = filtered_df[filtered_df['web_name'].isin(selected_players)]
+        # Selections as sorted tuples so toggling back to a previous state is a cache hit.
+        # The default (every team selected) needs no team filter at all.
+        teams_key = () if len(selected_teams) == len(teams) else tuple(sorted(selected_teams))
+        filtered_df = filter_live_data(df, live_key(df), teams_key, tuple(sorted(selected_players)))
             
         if filtered_df.empty:
             st.warning("No data matches your filters.")
@@ -194,187 +584,42 @@ def show_live_dashboard():
             # Use filtered_df for all downstream visualizations
             df = filtered_df 
 
-            # Timestamp from the data
-            last_updated = pd.to_datetime(df['ingested_at']).max()
+            # Timestamp from the data (computed once by Athena, identical on every row)
+            last_updated = pd.to_datetime(df['snapshot_ts'].iloc[0])
             st.markdown(f"**Last Updated:** {last_updated.strftime('%Y-%m-%d %H:%M:%S')}")
             st.markdown("---")
 
-        # Data Type Conversions
-        numeric_cols = ['goals', 'assists', 'minutes', 'saves', 'clean_sheets',
-                        'yellow_cards', 'red_cards', 'chance_of_playing', 'position_id']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        
-        # Float conversions for advanced stats
-        float_cols = ['form', 'influence', 'creativity', 'threat', 'ict_index']
-        for col in float_cols:
-             if col in df.columns:
-                 df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
-
         # Global KPI Row
+        kpis = kpi_totals(df)
         kpi1, kpi2, kpi3, kpi4 = st.columns(4)
         with kpi1:
-            st.metric("Total Players", len(df))
+            st.metric("Total Players", kpis['players'])
         with kpi2:
-            st.metric("Total Goals", int(df['goals'].sum()))
+            st.metric("Total Goals", kpis['goals'])
         with kpi3:
-            st.metric("Total Assists", int(df['assists'].sum()))
+            st.metric("Total Assists", kpis['assists'])
         with kpi4:
-            active_injuries = df[df['injury_news'] != ''].shape[0] if 'injury_news' in df.columns else 0
-            st.metric("Active Injuries", active_injuries)
+            st.metric("Active Injuries", kpis['injuries'])
 
         st.markdown("---")
 
+        # Leaderboards for every tab, each computed once per rerun
+        tops = {c: top_k(df, c) for c in ('goals', 'assists', 'saves', 'clean_sheets', 'minutes', 'creativity', 'ict_index')}
+        tops['threat'] = top_k(df, 'threat', k=15)
+
         # TABS
         tab_attack, tab_defense, tab_creative, tab_injury = st.tabs([
             "⚽ Attack", "🛡️ Defense & Discipline", "🎨 Creativity & Impact", "🚑 Injuries"
         ])
 
-        # --- TAB 1: ATTACK ---
         with tab_attack:
-            st.subheader("Attacking Prowess")
-            col_att1, col_att2 = st.columns(2)
-            
-            with col_att1:
-                st.markdown("#### 🥅 Top 10 Goal Scorers")
-                top_goals = df.sort_values('goals', ascending=False).head(10)
-                fig_goals = px.bar(
-                    top_goals, x='goals', y='web_name', orientation='h', color='team',
-                    title="Most Goals", labels={'goals': 'Goals', 'web_name': ''}, height=400
-                )
-                fig_goals.update_layout(yaxis=dict(autorange="reversed"))
-                st.plotly_chart(fig_goals, use_container_width=True)
-
-            with col_att2:
-                st.markdown("#### 🎯 Top 10 Assistants")
-                top_assists = df.sort_values('assists', ascending=False).head(10)
-                fig_assists = px.bar(
-                    top_assists, x='assists', y='web_name', orientation='h', color='team',
-                    title="Most Assists", labels={'assists': 'Assists', 'web_name': ''}, height=400
-                )
-                fig_assists.update_layout(yaxis=dict(autorange="reversed"))
-                st.plotly_chart(fig_assists, use_container_width=True)
-                
-            st.markdown("#### 🔥 Threat Leaders")
-            top_threat = df.sort_values('threat', ascending=False).head(15)
-            fig_threat = px.bar(
-                top_threat, x='web_name', y='threat', color='team',
-                title="Highest Threat Index", labels={'threat': 'Threat', 'web_name': ''}
-            )
-            st.plotly_chart(fig_threat, use_container_width=True)
-
-        # --- TAB 2: DEFENSE & DISCIPLINE ---
+            render_attack_tab(tops)
         with tab_defense:
-            st.subheader("Defensive & Discipline Metrics")
-            
-            col_def1, col_def2 = st.columns(2)
-            
-            with col_def1:
-                st.markdown("#### 🧤 Top Goalkeeper Saves")
-                # Filter for players with saves > 0 (Likely GKs)
-                saves_df = df[df['saves'] > 0].sort_values('saves', ascending=False).head(10)
-                if not saves_df.empty:
-                    fig_saves = px.bar(
-                        saves_df, x='saves', y='web_name', orientation='h', color='team',
-                        title="Most Saves", labels={'saves': 'Saves', 'web_name': ''}, height=400
-                    )
-                    fig_saves.update_layout(yaxis=dict(autorange="reversed"))
-                    st.plotly_chart(fig_saves, use_container_width=True)
-                else:
-                    st.info("No save data available.")
-
-            with col_def2:
-                st.markdown("#### 🛡️ Clean Sheets")
-                cs_df = df[df['clean_sheets'] > 0].sort_values('clean_sheets', ascending=False).head(10)
-                if not cs_df.empty:
-                    fig_cs = px.bar(
-                        cs_df, x='clean_sheets', y='web_name', orientation='h', color='team',
-                        title="Most Clean Sheets", labels={'clean_sheets': 'Clean Sheets', 'web_name': ''}, height=400
-                    )
-                    fig_cs.update_layout(yaxis=dict(autorange="reversed"))
-                    st.plotly_chart(fig_cs, use_container_width=True)
-                else:
-                    st.info("No clean sheet data available.")
-
-            st.markdown("---")
-            
-            col_misc1, col_misc2 = st.columns(2)
-            with col_misc1:
-                st.markdown("#### ⏱️ Most Played Minutes")
-                top_min = df.sort_values('minutes', ascending=False).head(10)
-                st.dataframe(top_min[['web_name', 'team', 'minutes']], hide_index=True, use_container_width=True)
-                
-            with col_misc2:
-                st.markdown("#### 🟨🟥 Discipline")
-                # Combined card view
-                cards_df = df[(df['yellow_cards'] > 0) | (df['red_cards'] > 0)].sort_values('yellow_cards', ascending=False).head(10)
-                st.dataframe(cards_df[['web_name', 'team', 'yellow_cards', 'red_cards']], hide_index=True, use_container_width=True)
-
-        # --- TAB 3: CREATIVITY & IMPACT ---
+            render_defense_tab(df, tops)
         with tab_creative:
-            st.subheader("Creativity, Influence & ICT Index")
-            
-            col_creat1, col_creat2 = st.columns(2)
-            
-            with col_creat1:
-                st.markdown("#### 🎨 Top Creators")
-                top_creative = df.sort_values('creativity', ascending=False).head(10)
-                fig_creative = px.bar(
-                    top_creative, x='creativity', y='web_name', orientation='h', color='team',
-                    title="Highest Creativity Score", labels={'creativity': 'Creativity', 'web_name': ''}, height=400
-                )
-                fig_creative.update_layout(yaxis=dict(autorange="reversed"))
-                st.plotly_chart(fig_creative, use_container_width=True)
-
-            with col_creat2:
-                st.markdown("#### 📊 ICT Index Leaders")
-                top_ict = df.sort_values('ict_index', ascending=False).head(10)
-                fig_ict = px.bar(
-                    top_ict, x='ict_index', y='web_name', orientation='h', color='team',
-                    title="Highest ICT Index", labels={'ict_index': 'ICT Index', 'web_name': ''}, height=400
-                )
-                fig_ict.update_layout(yaxis=dict(autorange="reversed"))
-                st.plotly_chart(fig_ict, use_container_width=True)
-                
-            st.markdown("#### 🧠 Creativity vs Influence")
-            fig_scatter = px.scatter(
-                df, x='influence', y='creativity', size='ict_index', color='team',
-                hover_data=['web_name'], title="Creativity vs Influence (Size = ICT Index)",
-                height=500
-            )
-            st.plotly_chart(fig_scatter, use_container_width=True)
-
-        # --- TAB 4: INJURIES ---
+            render_creative_tab(df, tops)
         with tab_injury:
-            st.subheader("🚑 Injury Ward & Availability")
-            
-            if 'injury_news' in df.columns:
-                injury_df = df[df['injury_news'] != ''].copy()
-                
-                if not injury_df.empty:
-                    view_cols = ['web_name', 'team', 'injury_news', 'chance_of_playing']
-                    injury_view = injury_df[view_cols].sort_values('chance_of_playing')
-                    
-                    def highlight_injury(row):
-                        val = row['chance_of_playing']
-                        if val == 0:
-                            return ['background-color: #8B0000; color: white'] * len(row) # Dark Red
-                        elif val < 50:
-                            return ['background-color: #B22222; color: white'] * len(row) # Firebrick
-                        elif val < 75:
-                            return ['background-color: #DAA520; color: black'] * len(row) # Goldenrod
-                        return [''] * len(row)
-
-                    st.dataframe(
-                        injury_view.style.apply(highlight_injury, axis=1),
-                        use_container_width=True,
-                        hide_index=True
-                    )
-                else:
-                    st.success("No active injuries reported!")
-            else:
-                st.info("Injury data not available in this view.")
+            render_injury_tab(df)
 
     elif df is not None:
         st.warning("Data fetched successfully but table is empty.")
@@ -382,18 +627,19 @@ def show_live_dashboard():
 # ----------------- Page 2: Team Analysis -----------------
 def show_team_analysis():
     st.title("📈 Team Performance Analysis")
-    df_hist = get_historical_data()
+    teams = get_history_teams()
     
-    if df_hist is not None and not df_hist.empty:
-        teams = sorted(df_hist['team'].unique().tolist())
+    if teams:
+        import plotly.express as px
+
         selected_team = st.selectbox("Select Team", options=teams)
+        selected_metric = st.selectbox("Select Metric", options=HISTORY_METRICS)
         
-        metrics = ["goals", "assists", "total_points", "creativity", "influence", "form", "threat", "ict_index"]
-        selected_metric = st.selectbox("Select Metric", options=metrics)
-        
-        # Aggregate by date
-        team_df = df_hist[df_hist['team'] == selected_team].copy()
-        daily_stats = team_df.groupby('date')[selected_metric].sum().reset_index()
+        # Aggregated by date in Athena
+        daily_stats = get_team_daily((selected_team,), selected_metric)
+        if daily_stats is None:
+            return
+        daily_stats = daily_stats[['date', selected_metric]]
         
         # Plotly Line Chart
         fig = px.line(
@@ -401,19 +647,22 @@ def show_team_analysis():
             title=f"{selected_team} - {selected_metric.replace('_', ' ').capitalize()} Trend",
             markers=True
         )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True, key="fig_team_trend")
         
         # Comparison logic
         compare_teams = st.multiselect("Compare with other teams", options=[t for t in teams if t != selected_team])
         if compare_teams:
             all_teams = [selected_team] + compare_teams
-            comp_df = df_hist[df_hist['team'].isin(all_teams)].copy()
-            comp_daily = comp_df.groupby(['date', 'team'])[selected_metric].sum().reset_index()
-            fig_comp = px.line(comp_daily, x='date', y=selected_metric, color='team', markers=True, title="Team Comparison")
-            st.plotly_chart(fig_comp, use_container_width=True)
+            comp_daily = get_team_daily(tuple(all_teams), selected_metric)
+            if comp_daily is not None:
+                fig_comp = px.line(comp_daily, x='date', y=selected_metric, color='team', markers=True, title="Team Comparison")
+                st.plotly_chart(fig_comp, use_container_width=True, key="fig_comp")
 
         st.markdown("### Daily Aggregate Data")
-        st.dataframe(daily_stats.sort_values('date', ascending=False), use_container_width=True, hide_index=True)
+        st.dataframe(
+            daily_stats.sort_values('date', ascending=False), use_container_width=True, hide_index=True,
+            column_config={'date': st.column_config.DateColumn('date')}
+        )
     else:
         st.info("Historical data is loading or unavailable.")
 
@@ -423,18 +672,17 @@ def show_player_stats():
     df_hist = get_historical_data()
     
     if df_hist is not None and not df_hist.empty:
+        import plotly.express as px
+
         # Player Selection
+        key = history_key(df_hist)
         teams = sorted(df_hist['team'].unique().tolist())
         sel_team = st.selectbox("Filter by Team", options=["All"] + teams)
         
-        if sel_team != "All":
-            players = sorted(df_hist[df_hist['team'] == sel_team]['web_name'].unique().tolist())
-        else:
-            players = sorted(df_hist['web_name'].unique().tolist())
-            
+        players = history_players(df_hist, key, sel_team)
         selected_player = st.selectbox("Select Player", options=players)
         
-        player_df = df_hist[df_hist['web_name'] == selected_player].copy()
+        player_df = player_history(df_hist, key, selected_player)
         
         # KPI Row for Player
         st.subheader(f"Summary for {selected_player}")
@@ -448,17 +696,18 @@ def show_player_stats():
         with col1:
             st.markdown("#### Points Progression")
             fig_pts = px.area(player_df, x='date', y='total_points', title="Daily Total Points")
-            st.plotly_chart(fig_pts, use_container_width=True)
+            st.plotly_chart(fig_pts, use_container_width=True, key="fig_pts")
         with col2:
             st.markdown("#### Creative & Impact Indices")
             fig_idx = px.line(player_df, x='date', y=['creativity', 'influence', 'threat', 'form'], title="Index Trends Over Time")
-            st.plotly_chart(fig_idx, use_container_width=True)
+            st.plotly_chart(fig_idx, use_container_width=True, key="fig_idx")
             
         st.markdown("### Historical Log")
         st.dataframe(
             player_df[['date', 'goals', 'assists', 'total_points', 'form', 'creativity', 'influence', 'threat']].sort_values('date', ascending=False), 
             hide_index=True,
-            use_container_width=True
+            use_container_width=True,
+            column_config={'date': st.column_config.DateColumn('date')}
         )
     else:
         st.info("Historical data is loading or unavailable.")
@@ -1,20 +1,26 @@
 import boto3
 import sys
 
+glue = boto3.client('glue', region_name='eu-north-1')
+
 def check_glue_tables():
     try:
-        glue = boto3.client('glue', region_name='eu-north-1')
         database_name = 'football_db'
         
-        response = glue.get_tables(DatabaseName=database_name)
-        tables = [t['Name'] for t in response['TableList']]
+        # Glue filters by name server-side, so only FPL tables come back. Paginated, since a
+        # single get_tables response is silently truncated on large catalogs.
+        paginator = glue.get_paginator('get_tables')
+        fpl_tables = [
+            t['Name']
+            for page in paginator.paginate(DatabaseName=database_name, Expression='raw_fpl_live_data.*')
+            for t in page['TableList']
+        ]
         
-        print(f"Tables in {database_name}:")
-        for table in tables:
+        print(f"FPL tables in {database_name}:")
+        for table in fpl_tables:
             print(f" - {table}")
             
         # Find latest raw_fpl_live_data table
-        fpl_tables = [t for t in tables if t.startswith('raw_fpl_live_data')]
         if fpl_tables:
             latest_table = sorted(fpl_tables)[-1]
             print(f"\nLatest FPL table: {latest_table}")
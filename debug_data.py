@@ -1,18 +1,42 @@
 import boto3
 import awswrangler as wr
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+AWS_REGION = "eu-north-1"
+DATABASE = "football_db"
+
+session = boto3.Session(region_name=AWS_REGION)
+
+def _count_one_table(table):
+    # Returns the report lines rather than printing, so threads don't interleave output
+    query = f'SELECT count(*) as count FROM "{table}"'
+    try:
+        # boto3 Sessions aren't thread-safe, so each worker call builds its own
+        df = wr.athena.read_sql_query(
+            sql=query,
+            database=DATABASE,
+            boto3_session=boto3.Session(region_name=AWS_REGION)
+        )
+        count = df['count'].iloc[0]
+        lines = [f"Table: {table:<40} | Rows: {count}"]
+        
+        if count > 0:
+             # If we find a table with data, print its columns to ensure compatibility
+             lines.append(f"  -> Found data! Columns: {df.columns.tolist()}")
+        return lines
+             
+    except Exception as e:
+        return [f"Table: {table:<40} | Error querying: {e}"]
 
 def debug_data():
-    region = "eu-north-1"
-    database = "football_db"
-    
-    session = boto3.Session(region_name=region)
-    print(f"Checking database: {database} in {region}")
+    print(f"Checking database: {DATABASE} in {AWS_REGION}")
     
     try:
         # List tables
-        tables = wr.catalog.tables(database=database, boto3_session=session)
-        fpl_tables = [t for t in tables['Table'].tolist() if t.startswith('raw_fpl_live_data')]
+        # Prefix filter is applied by Glue, not after listing the whole catalog
+        tables = wr.catalog.tables(database=DATABASE, name_prefix='raw_fpl_live_data', boto3_session=session)
+        fpl_tables = tables['Table'].tolist()
         
         if not fpl_tables:
             print("No 'raw_fpl_live_data' tables found.")
@@ -20,23 +44,12 @@ def debug_data():
 
         print(f"Found {len(fpl_tables)} tables. Checking row counts for each...")
         
-        for table in fpl_tables:
-            query = f'SELECT count(*) as count FROM "{table}"'
-            try:
-                df = wr.athena.read_sql_query(
-                    sql=query,
-                    database=database,
-                    boto3_session=session
-                )
-                count = df['count'].iloc[0]
-                print(f"Table: {table:<40} | Rows: {count}")
-                
-                if count > 0:
-                     # If we find a table with data, print its columns to ensure compatibility
-                     print(f"  -> Found data! Columns: {df.columns.tolist()}")
-                     
-            except Exception as e:
-                print(f"Table: {table:<40} | Error querying: {e}")
+        # Athena accepts concurrent submissions, so the per-table queries overlap instead of
+        # queueing one after another. map() keeps the report in table order.
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            for lines in executor.map(_count_one_table, fpl_tables):
+                for line in lines:
+                    print(line)
 
     except Exception as e:
         print(f"Error: {e}")
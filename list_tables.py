@@ -1,42 +1,62 @@
 import boto3
 import awswrangler as wr
+import pandas as pd
 
 AWS_REGION = "eu-north-1"
 DATABASE = "football_db"
 
 session = boto3.Session(region_name=AWS_REGION)
 
+def read_counts(sql):
+    """Run a count query and index the result by its 'tbl' column."""
+    return wr.athena.read_sql_query(
+        sql=sql,
+        database=DATABASE,
+        boto3_session=session,
+        ctas_approach=False
+    ).set_index('tbl')
+
 print(f"Listing tables in {DATABASE}...")
 try:
     tables = wr.catalog.tables(database=DATABASE, boto3_session=session)
     table_names = tables['Table'].tolist()
-    
-    for table in table_names:
-        print(f"Checking table: {table}")
-        try:
-            query = f'SELECT count(*) as count FROM "{table}"'
-            df = wr.athena.read_sql_query(
-                sql=query,
-                database=DATABASE,
-                boto3_session=session,
-                ctas_approach=False
+
+    if not table_names:
+        print("No tables found.")
+    else:
+        # One Athena query for all tables (row count + non-null assists per table) instead
+        # of two queries per table. Tables without an 'assists' column report NULL there
+        # rather than failing the whole batch.
+        selects = {}
+        for table, columns in zip(tables['Table'], tables['Columns']):
+            has_assists = 'assists' in [c.strip() for c in str(columns).split(',')]
+            filled = 'count(assists)' if has_assists else 'CAST(NULL AS bigint)'
+            selects[table] = (
+                f"SELECT '{table}' as tbl, count(*) as count, {filled} as filled_assists "
+                f'FROM "{DATABASE}"."{table}"'
             )
-            count = df['count'].iloc[0]
-            print(f"  -> Rows: {count}")
-            
-            # Check for non-null assists in a small sample if rows > 0
-            if count > 0:
-                 q_sample = f'SELECT count(assists) as filled_assists FROM "{table}" WHERE assists IS NOT NULL'
-                 df_sample = wr.athena.read_sql_query(
-                    sql=q_sample,
-                    database=DATABASE,
-                    boto3_session=session
-                 )
-                 filled = df_sample['filled_assists'].iloc[0]
-                 print(f"  -> Non-null assists: {filled}")
 
+        try:
+            counts = read_counts("\nUNION ALL\n".join(selects.values()))
         except Exception as e:
-            print(f"  -> Error: {e}")
-            
+            # One broken table fails the whole batch; retry per table so the others still report
+            print(f"Batched query failed ({e}), querying tables one by one...")
+            counts = None
+
+        for table in table_names:
+            print(f"Checking table: {table}")
+            try:
+                row = counts.loc[table] if counts is not None else read_counts(selects[table]).loc[table]
+                count = row['count']
+                print(f"  -> Rows: {count}")
+
+                # Non-null assists, if the table has rows and an assists column
+                filled = row['filled_assists']
+                if count > 0 and pd.notna(filled):
+                    print(f"  -> Non-null assists: {filled}")
+
+            except Exception as e:
+                print(f"  -> Error: {e}")
+
 except Exception as e:
     print(e)
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+# Athena SQL shared by app.py and materialize_latest.py. Kept free of Streamlit so the
+# scheduled rebuild job can import it.
+
+# Columns the live view renders besides id, name and ingestion timestamps. Listing them
+# explicitly (never SELECT *) lets Athena prune every other Parquet column at scan time.
+LIVE_COLS = (
+    "team", "goals", "assists", "minutes", "saves", "clean_sheets", "yellow_cards", "red_cards",
+    "chance_of_playing", "position_id", "form", "influence", "creativity", "threat", "ict_index",
+    "injury_news",
+)
+LIVE_LOOKBACK_DAYS = 2  # Only the most recent snapshots are needed for the live view
+
+def partition_filter(since):
+    """Predicate on the year/month/day partition columns keeping days on or after `since`.
+
+    Athena can't derive partition pruning from an ingested_at range, so queries add this
+    alongside their timestamp filter. The casts work whether the partitions are typed as
+    strings or integers.
+    """
+    return (
+        "CAST(year AS integer) * 10000 + CAST(month AS integer) * 100 + CAST(day AS integer)"
+        f" >= {since:%Y%m%d}"
+    )
+
+def live_cutoff():
+    """First day of the live lookback window.
+
+    Day-granular, so the query text stays stable within a day, and Athena skips older
+    files via Parquet min/max statistics.
+    """
+    return (datetime.now(timezone.utc) - timedelta(days=LIVE_LOOKBACK_DAYS)).date()
+
+def live_dedup_query(database, table, cutoff):
+    """Latest row per player ingested since `cutoff`, plus the newest ingestion as snapshot_ts.
+
+    Uses max_by(): a hash aggregation on id, rather than a ROW_NUMBER() window that has
+    to sort every partition.
+    """
+    latest_cols = ",\n        ".join(f"max_by({c}, ingested_at) as {c}" for c in LIVE_COLS)
+    return f"""
+    SELECT
+        id,
+        max_by(name, ingested_at) as web_name,
+        {latest_cols},
+        max(ingested_at) as ingested_at,
+        max(max(ingested_at)) OVER () as snapshot_ts
+    FROM "{database}"."{table}"
+    WHERE ingested_at >= '{cutoff}' AND {partition_filter(cutoff)}
+    GROUP BY id
+    """
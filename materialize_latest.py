@@ -0,0 +1,74 @@
+import boto3
+import awswrangler as wr
+from datetime import datetime, timezone
+from live_queries import live_cutoff, live_dedup_query
+
+# Rebuilds the deduplicated "latest snapshot" table that app.py reads for the live view.
+# Run it on a schedule (e.g. EventBridge -> Lambda via lambda_handler, every 10 minutes)
+# so the dashboard no longer has to deduplicate the full history table on every load.
+
+AWS_REGION = "eu-north-1"
+DATABASE = "football_db"
+SOURCE_TABLE = "live_portfolio_projected"
+LATEST_TABLE = "live_portfolio_latest"
+S3_CURATED = "s3://portfolio-lake-yevhen-3991/curated/"
+KEEP_VERSIONS = 2  # Current build plus the previous one, which in-flight queries may still read
+
+session = boto3.Session(region_name=AWS_REGION)
+
+def materialize_latest():
+    # Same deduplication as the on-the-fly fallback in app.py's get_live_data()
+    cutoff = live_cutoff()
+    query = live_dedup_query(DATABASE, SOURCE_TABLE, cutoff)
+
+    # Each rebuild writes a new versioned table and location; the live table is only
+    # repointed once the build has succeeded, so readers never see it missing or empty.
+    version = datetime.now(timezone.utc).strftime("v%Y%m%d%H%M%S")
+    staging_table = f"{LATEST_TABLE}_{version}"
+    wr.athena.create_ctas_table(
+        sql=query,
+        database=DATABASE,
+        ctas_table=staging_table,
+        s3_output=f"{S3_CURATED}{LATEST_TABLE}/{version}/",
+        storage_format="PARQUET",
+        write_compression="SNAPPY",
+        boto3_session=session,
+        wait=True
+    )
+    _swap_in(staging_table)
+    _drop_old_versions()
+    print(f"Rebuilt {DATABASE}.{LATEST_TABLE} ({version}) from {SOURCE_TABLE} (ingested since {cutoff})")
+
+def _swap_in(staging_table):
+    """Point LATEST_TABLE at the staging table's schema and location in a single Glue update."""
+    glue = session.client("glue")
+    staged = glue.get_table(DatabaseName=DATABASE, Name=staging_table)["Table"]
+    table_input = {
+        "Name": LATEST_TABLE,
+        "TableType": staged["TableType"],
+        "Parameters": staged.get("Parameters", {}),
+        "StorageDescriptor": staged["StorageDescriptor"],
+        "PartitionKeys": staged.get("PartitionKeys", []),
+    }
+    if wr.catalog.does_table_exist(database=DATABASE, table=LATEST_TABLE, boto3_session=session):
+        glue.update_table(DatabaseName=DATABASE, TableInput=table_input)
+    else:
+        glue.create_table(DatabaseName=DATABASE, TableInput=table_input)
+    # Only the catalog entry goes; its data is now the live table's location
+    glue.delete_table(DatabaseName=DATABASE, Name=staging_table)
+
+def _drop_old_versions():
+    """Delete all but the newest KEEP_VERSIONS build locations (version names sort by time)."""
+    versions = sorted(wr.s3.list_directories(f"{S3_CURATED}{LATEST_TABLE}/", boto3_session=session))
+    for path in versions[:-KEEP_VERSIONS]:
+        wr.s3.delete_objects(path, boto3_session=session)
+
+def lambda_handler(event, context):
+    materialize_latest()
+    return {"table": f"{DATABASE}.{LATEST_TABLE}"}
+
+if __name__ == "__main__":
+    try:
+        materialize_latest()
+    except Exception as e:
+        print(f"Error materializing latest snapshot: {e}")